@@ -0,0 +1,170 @@
+import asyncio
+import gzip
+import hashlib
+import json
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi import Response
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Completed proofs never change, so clients and CDNs may keep them forever.
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# Encoded bodies keyed by their ETag. Artifacts are immutable, so entries
+# never go stale; the bound only caps memory.
+_CACHE_SIZE = 256
+_encoded_cache = OrderedDict()
+
+# Hashing and gzip/zstd run here on a cache miss, off the event loop.
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="artifacts")
+
+
+def _supported_encodings():
+    encodings = ["gzip"]
+    if zstandard is not None:
+        encodings.insert(0, "zstd")
+    return encodings
+
+
+def choose_encoding(accept_encoding):
+    """Pick the best content-coding from an Accept-Encoding header."""
+    if not accept_encoding:
+        return "identity"
+
+    qualities = {}
+    for part in accept_encoding.split(","):
+        fields = [f.strip() for f in part.split(";")]
+        coding = fields[0].lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in fields[1:]:
+            if param.startswith("q="):
+                try:
+                    q = float(param[2:])
+                except ValueError:
+                    q = 0.0
+        qualities[coding] = q
+
+    best = "identity"
+    best_q = 0.0
+    for coding in _supported_encodings():
+        q = qualities.get(coding, qualities.get("*", 0.0))
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+def _compress(body, encoding):
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor(level=10).compress(body)
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=9, mtime=0)
+    return body
+
+
+async def _encoded_body(body, etag, encoding):
+    cached = _encoded_cache.get(etag)
+    if cached is not None:
+        _encoded_cache.move_to_end(etag)
+        return cached
+
+    loop = asyncio.get_running_loop()
+    encoded = await loop.run_in_executor(_executor, _compress, body, encoding)
+    _encoded_cache[etag] = encoded
+    if len(_encoded_cache) > _CACHE_SIZE:
+        _encoded_cache.popitem(last=False)
+    return encoded
+
+
+def _etag_matches(if_none_match, etag):
+    """Weak comparison (RFC 9110 13.1.2) of If-None-Match against etag."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # Proxies that re-encode responses often weaken strong tags to W/"...".
+    opaque = etag.strip('"')
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate.strip('"') == opaque:
+            return True
+    return False
+
+
+def representation_etag(digest, kind, encoding):
+    """Strong ETag for one artifact kind ("proof" or "bundle") in one coding."""
+    tag = f"{digest}-{kind}"
+    if encoding != "identity":
+        tag += f"-{encoding}"
+    return f'"{tag}"'
+
+
+async def artifact_response(request, digest, kind, load_body, media_type, filename=None):
+    """Build a cacheable, content-negotiated response for an immutable artifact.
+
+    digest is the proof digest stored when the request completed; when it is
+    known, a matching If-None-Match is answered without calling load_body.
+    """
+    headers = {
+        "Cache-Control": IMMUTABLE_CACHE_CONTROL,
+        "Vary": "Accept-Encoding",
+    }
+    if filename:
+        headers["Content-Disposition"] = 'attachment; filename="%s"' % filename
+
+    encoding = choose_encoding(request.headers.get("accept-encoding"))
+    if encoding != "identity":
+        headers["Content-Encoding"] = encoding
+
+    body = None
+    if digest is None:
+        # Requests completed before digests were stored
+        body = await load_body()
+        loop = asyncio.get_running_loop()
+        digest = await loop.run_in_executor(_executor, lambda: hashlib.sha256(body).hexdigest())
+
+    # Each coding is a different representation and needs its own strong tag;
+    # a 304 is only sent for the tag of the representation we would serve.
+    etag = representation_etag(digest, kind, encoding)
+    headers["ETag"] = etag
+
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    if body is None and etag not in _encoded_cache:
+        body = await load_body()
+    content = await _encoded_body(body, etag, encoding)
+    return Response(content=content, media_type=media_type, headers=headers)
+
+
+def proof_bytes(req):
+    return bytes.fromhex(req["proof"])
+
+
+def bundle_bytes(req):
+    public_instances = []
+    if req["public_instances"]:
+        try:
+            public_instances = json.loads(req["public_instances"])
+        except ValueError:
+            pass
+
+    bundle = {
+        "id": req["id"],
+        "proof": req["proof"],
+        "public_instances": public_instances,
+        "calldata": req.get("calldata"),
+    }
+    return json.dumps(bundle, separators=(",", ":"), sort_keys=True).encode("utf-8")
+
+
+def shutdown():
+    _executor.shutdown(wait=True)
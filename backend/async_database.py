@@ -0,0 +1,74 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+import database
+import retention
+
+# Async wrappers around the sync database module for the FastAPI handlers.
+# Calls run on a dedicated executor so sqlite3 never blocks the event loop;
+# workers and scripts keep using `database` directly.
+
+DB_WORKERS = 4
+# Max calls queued or running at once; further callers wait for a slot.
+DB_QUEUE_SIZE = 64
+
+_executor = ThreadPoolExecutor(max_workers=DB_WORKERS, thread_name_prefix="db")
+_slots = asyncio.Semaphore(DB_QUEUE_SIZE)
+# Retention passes are long, so they get their own thread and never hold
+# a handler slot.
+_retention_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="retention")
+
+
+async def _run(func, *args, **kwargs):
+    async with _slots:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_executor, functools.partial(func, *args, **kwargs))
+
+
+async def create_request(data):
+    return await _run(database.create_request, data)
+
+
+async def get_request(req_id):
+    return await _run(database.get_request, req_id)
+
+
+async def get_request_summary(req_id):
+    return await _run(database.get_request_summary, req_id)
+
+
+async def get_history(limit=50, offset=0):
+    return await _run(database.get_history, limit, offset)
+
+
+async def load_archived(req):
+    return await _run(retention.load_archived, req)
+
+
+async def run_retention():
+    loop = asyncio.get_running_loop()
+    archived = 0
+    while True:
+        count = await loop.run_in_executor(_retention_executor, retention.archive_batch)
+        if not count:
+            break
+        archived += count
+        await asyncio.sleep(retention.ARCHIVE_BATCH_PAUSE_SECONDS)
+    # Keep releasing free pages until the freelist is empty, so a large
+    # first-run backlog actually shrinks the file in this pass
+    remaining = await loop.run_in_executor(_retention_executor, retention.incremental_vacuum)
+    while remaining:
+        await asyncio.sleep(retention.ARCHIVE_BATCH_PAUSE_SECONDS)
+        previous = remaining
+        remaining = await loop.run_in_executor(_retention_executor, retention.incremental_vacuum)
+        if remaining >= previous:
+            break
+    if archived:
+        print(f"Retention: archived {archived} proofs")
+    return archived
+
+
+def shutdown():
+    _retention_executor.shutdown(wait=True)
+    _executor.shutdown(wait=True)
@@ -1,5 +1,6 @@
 import sqlite3
 import json
+import hashlib
 from datetime import datetime
 
 DB_PATH = "veriscore.db"
@@ -7,6 +8,10 @@ DB_PATH = "veriscore.db"
 def init_db():
     conn = sqlite3.connect(DB_PATH)
     c = conn.cursor()
+    # Incremental auto-vacuum lets retention hand freed pages back to the OS.
+    # This only takes effect on new files; existing ones need
+    # `python backend/retention.py migrate` (see enable_incremental_vacuum).
+    c.execute('PRAGMA auto_vacuum = INCREMENTAL')
     c.execute('''
         CREATE TABLE IF NOT EXISTS requests (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -18,14 +23,61 @@ def init_db():
             input_hash TEXT,
             proof TEXT,
             public_instances TEXT,
+            calldata TEXT,
+            proof_sha256 TEXT,
+            batch_key TEXT,
+            archive_segment INTEGER,
+            archive_offset INTEGER,
             status TEXT DEFAULT 'Pending',
             tx_hash TEXT,
             created_at TIMESTAMP
         )
     ''')
+    # Add columns missing from databases created by older versions
+    columns = [row[1] for row in c.execute('PRAGMA table_info(requests)')]
+    for name, col_type in (('calldata', 'TEXT'), ('proof_sha256', 'TEXT'), ('batch_key', 'TEXT'), ('archive_segment', 'INTEGER'), ('archive_offset', 'INTEGER')):
+        if name not in columns:
+            c.execute(f'ALTER TABLE requests ADD COLUMN {name} {col_type}')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_requests_created_at ON requests (created_at)')
+    # Only rows retention can still archive, so its scan never revisits archived history
+    c.execute('''
+        CREATE INDEX IF NOT EXISTS idx_requests_archivable ON requests (created_at)
+        WHERE archive_segment IS NULL AND proof IS NOT NULL
+    ''')
+    c.execute('DROP INDEX IF EXISTS idx_requests_input_hash')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_requests_batch_key ON requests (batch_key)')
     conn.commit()
+    if c.execute('PRAGMA auto_vacuum').fetchone()[0] != 2:
+        print(f"WARNING: {DB_PATH} is not in incremental vacuum mode; archived space will not be freed. "
+              "Run `python backend/retention.py migrate` while the server is stopped.")
     conn.close()
 
+def enable_incremental_vacuum():
+    """One-off conversion of an existing database to incremental auto-vacuum.
+
+    Rewrites the whole file with VACUUM, so it needs exclusive access and
+    can take a while on a large database.
+    """
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        c = conn.cursor()
+        if c.execute('PRAGMA auto_vacuum').fetchone()[0] == 2:
+            return False
+        c.execute('PRAGMA auto_vacuum = INCREMENTAL')
+        c.execute('VACUUM')
+        return True
+    finally:
+        conn.close()
+
+# Everything except the large proof/calldata text
+SUMMARY_COLUMNS = 'id, age, income, debt, history, open_acc, input_hash, public_instances, proof_sha256, archive_segment, archive_offset, status, tx_hash, created_at'
+
+def proof_digest(proof_str):
+    """Identifies a completed proof; the artifact endpoints build ETags from it."""
+    if not proof_str:
+        return None
+    return hashlib.sha256(proof_str.encode('utf-8')).hexdigest()
+
 def create_request(data):
     conn = sqlite3.connect(DB_PATH)
     c = conn.cursor()
@@ -43,7 +95,34 @@ def create_request(data):
     conn.close()
     return req_id
 
-def update_request_proof(req_id, proof, public_instances=None, status='Completed', error=None):
+def record_request(data, batch_key, proof=None, public_instances=None, status='Completed', calldata=None):
+    """Insert an already-finished request, at most once per batch_key.
+
+    Returns False if a row with that batch_key already exists.
+    """
+    conn = sqlite3.connect(DB_PATH)
+    c = conn.cursor()
+    created_at = datetime.now()
+
+    instances_str = None
+    if public_instances:
+        instances_str = json.dumps(public_instances)
+
+    c.execute('''
+        INSERT INTO requests (age, income, debt, history, open_acc, batch_key, proof, public_instances, calldata, proof_sha256, status, created_at)
+        SELECT ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?
+        WHERE NOT EXISTS (SELECT 1 FROM requests WHERE batch_key = ?)
+    ''', (
+        data.age, data.income, data.debt, data.history, data.open_acc,
+        batch_key, proof, instances_str, calldata, proof_digest(proof), status, created_at,
+        batch_key
+    ))
+    inserted = c.rowcount == 1
+    conn.commit()
+    conn.close()
+    return inserted
+
+def update_request_proof(req_id, proof, public_instances=None, status='Completed', error=None, calldata=None):
     conn = sqlite3.connect(DB_PATH)
     c = conn.cursor()
     
@@ -57,9 +136,9 @@ def update_request_proof(req_id, proof, public_instances=None, status='Completed
 
     c.execute('''
         UPDATE requests 
-        SET proof = ?, public_instances = ?, status = ?
+        SET proof = ?, public_instances = ?, calldata = ?, proof_sha256 = ?, status = ?
         WHERE id = ?
-    ''', (proof_str, instances_str, status, req_id))
+    ''', (proof_str, instances_str, calldata, proof_digest(proof_str), status, req_id))
     conn.commit()
     conn.close()
 
@@ -74,11 +153,26 @@ def get_request(req_id):
         return dict(row)
     return None
 
-def get_history():
+def get_request_summary(req_id):
+    """Like get_request, but without loading the proof and calldata."""
+    conn = sqlite3.connect(DB_PATH)
+    conn.row_factory = sqlite3.Row
+    c = conn.cursor()
+    c.execute(f'SELECT {SUMMARY_COLUMNS} FROM requests WHERE id = ?', (req_id,))
+    row = c.fetchone()
+    conn.close()
+    if row:
+        return dict(row)
+    return None
+
+# Columns exposed by /history; proofs are served by the artifact endpoints
+HISTORY_COLUMNS = 'id, age, income, debt, history, open_acc, public_instances, status, tx_hash, created_at'
+
+def get_history(limit=50, offset=0):
     conn = sqlite3.connect(DB_PATH)
     conn.row_factory = sqlite3.Row
     c = conn.cursor()
-    c.execute('SELECT * FROM requests ORDER BY created_at DESC')
+    c.execute(f'SELECT {HISTORY_COLUMNS} FROM requests ORDER BY created_at DESC LIMIT ? OFFSET ?', (limit, offset))
     rows = c.fetchall()
     conn.close()
     return [dict(row) for row in rows]
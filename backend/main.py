@@ -1,4 +1,4 @@
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Request, Query
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 import ezkl
@@ -7,9 +7,13 @@ import json
 import tempfile
 import asyncio
 import database
+import async_database
+import retention
+from contextlib import asynccontextmanager
 import concurrent.futures
 from concurrent.futures import ProcessPoolExecutor
 import worker
+import artifacts
 
 # Initialize DB on startup
 database.init_db()
@@ -26,7 +30,23 @@ else:
     SCALER_MEAN = [0] * 5
     SCALER_SCALE = [1] * 5
 
-app = FastAPI()
+async def retention_loop():
+    while True:
+        try:
+            await async_database.run_retention()
+        except Exception as e:
+            print(f"Retention Error: {e}")
+        await asyncio.sleep(retention.RETENTION_INTERVAL_SECONDS)
+
+@asynccontextmanager
+async def lifespan(app):
+    retention_task = asyncio.create_task(retention_loop())
+    yield
+    retention_task.cancel()
+    async_database.shutdown()
+    artifacts.shutdown()
+
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -55,6 +75,7 @@ def process_proof_task(req_id: int, data: CreditInput):
     proof_path = None
     input_path = None
     witness_path = None
+    calldata_path = None
     
     try:
         # 1. Format input for EZKL
@@ -117,6 +138,16 @@ def process_proof_task(req_id: int, data: CreditInput):
                  proof_bytes = proof_bytes.encode('utf-8')
         
         proof_hex = proof_bytes.hex()
+
+        # EVM calldata for verifyProof, served alongside the proof artifact
+        calldata_hex = None
+        calldata_path = input_path + ".calldata"
+        try:
+            ezkl.encode_evm_calldata(proof_path, calldata_path)
+            with open(calldata_path, "rb") as f:
+                calldata_hex = f.read().hex()
+        except Exception as e:
+            print(f"Error encoding calldata: {e}")
         
         # Extract Public Instances
         public_instances = []
@@ -143,7 +174,7 @@ def process_proof_task(req_id: int, data: CreditInput):
                 print(f"Error loading witness: {e}")
                 pass
         
-        database.update_request_proof(req_id, proof_hex, public_instances=public_instances, status='Completed')
+        database.update_request_proof(req_id, proof_hex, public_instances=public_instances, status='Completed', calldata=calldata_hex)
         print(f"Job {req_id} Completed")
 
     except Exception as e:
@@ -152,12 +183,13 @@ def process_proof_task(req_id: int, data: CreditInput):
     finally:
         if input_path and os.path.exists(input_path): os.remove(input_path)
         if witness_path and os.path.exists(witness_path): os.remove(witness_path)
+        if calldata_path and os.path.exists(calldata_path): os.remove(calldata_path)
         if proof_path and os.path.exists(proof_path) and proof_path != "cached_proof.json": os.remove(proof_path)
 
 @app.post("/generate-proof")
 async def generate_proof(data: CreditInput, background_tasks: BackgroundTasks):
     try:
-        req_id = database.create_request(data)
+        req_id = await async_database.create_request(data)
         background_tasks.add_task(process_proof_task, req_id, data)
         return {
             "id": req_id,
@@ -170,26 +202,62 @@ async def generate_proof(data: CreditInput, background_tasks: BackgroundTasks):
 
 @app.get("/requests/{req_id}")
 async def get_request_status(req_id: int):
-    req = database.get_request(req_id)
+    req = await async_database.get_request_summary(req_id)
     if not req:
         raise HTTPException(status_code=404, detail="Request not found")
-    public_instances = []
-    if req['public_instances']:
-        try:
-            public_instances = json.loads(req['public_instances'])
-        except:
-            pass
 
-    return {
+    # The proof itself is served by the cacheable artifact endpoints
+    response = {
         "id": req['id'],
         "status": req['status'],
-        "proof": req['proof'],
-        "public_instances": public_instances
     }
+    if req['status'] == 'Completed':
+        response["artifact_url"] = f"/requests/{req_id}/artifact"
+        response["proof_url"] = f"/requests/{req_id}/artifact/proof"
+    return response
+
+async def get_completed_summary(req_id: int):
+    req = await async_database.get_request_summary(req_id)
+    if not req:
+        raise HTTPException(status_code=404, detail="Request not found")
+    if req['status'] != 'Completed':
+        raise HTTPException(status_code=409, detail=f"Proof not available (status: {req['status']})")
+    return req
+
+async def load_completed_request(req_id: int):
+    req = await async_database.get_request(req_id)
+    # Old proofs live in the archive segments rather than the hot table
+    req = await async_database.load_archived(req)
+    if not req or not req['proof']:
+        raise HTTPException(status_code=409, detail="Proof not available")
+    return req
+
+@app.get("/requests/{req_id}/artifact")
+async def get_request_artifact(req_id: int, request: Request):
+    summary = await get_completed_summary(req_id)
+
+    async def load_body():
+        return artifacts.bundle_bytes(await load_completed_request(req_id))
+
+    return await artifacts.artifact_response(
+        request, summary['proof_sha256'], "bundle", load_body, "application/json"
+    )
+
+@app.get("/requests/{req_id}/artifact/proof")
+async def download_request_proof(req_id: int, request: Request):
+    summary = await get_completed_summary(req_id)
+
+    async def load_body():
+        return artifacts.proof_bytes(await load_completed_request(req_id))
+
+    return await artifacts.artifact_response(
+        request, summary['proof_sha256'], "proof", load_body, "application/octet-stream",
+        filename=f"proof-{req_id}.json"
+    )
 
 @app.get("/history")
-async def get_history():
-    return database.get_history()
+async def get_history(limit: int = Query(50, ge=1, le=200), offset: int = Query(0, ge=0)):
+    return await async_database.get_history(limit, offset)
 
 if __name__ == "__main__":
     import uvicorn
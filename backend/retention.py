@@ -0,0 +1,202 @@
+import argparse
+import json
+import os
+import sqlite3
+import struct
+import sys
+import threading
+import time
+import zlib
+from datetime import datetime, timedelta
+
+import database
+
+# Completed proofs older than this are moved out of SQLite into archive segments.
+RETENTION_MAX_AGE_DAYS = float(os.environ.get("VERICRED_RETENTION_DAYS", "30"))
+# How often the background task archives and vacuums.
+RETENTION_INTERVAL_SECONDS = int(os.environ.get("VERICRED_RETENTION_INTERVAL", "3600"))
+
+ARCHIVE_DIR = "archive"
+MAX_SEGMENT_BYTES = 64 * 1024 * 1024
+# Rows archived per transaction, so the hot table is never locked for long.
+ARCHIVE_BATCH_SIZE = 500
+# Pause between archive and vacuum batches so request handlers get the
+# SQLite write lock.
+ARCHIVE_BATCH_PAUSE_SECONDS = 0.5
+# How long an archive batch waits for another writer to release the database.
+LOCK_TIMEOUT_SECONDS = 30
+# Free pages released per incremental vacuum pass.
+VACUUM_PAGES = 2000
+
+# Each record is a header (request id, payload length) followed by a
+# zlib-compressed JSON payload. Segments are only ever appended to; the
+# archive_segment/archive_offset columns in SQLite are the offset index.
+_HEADER = struct.Struct(">QI")
+
+_write_lock = threading.Lock()
+
+
+def _segment_path(segment):
+    return os.path.join(ARCHIVE_DIR, f"segment-{segment:06d}.seg")
+
+
+def _current_segment():
+    segments = [
+        int(name[len("segment-"):-len(".seg")])
+        for name in os.listdir(ARCHIVE_DIR)
+        if name.startswith("segment-") and name.endswith(".seg")
+    ]
+    if not segments:
+        return 1
+    segment = max(segments)
+    if os.path.getsize(_segment_path(segment)) >= MAX_SEGMENT_BYTES:
+        segment += 1
+    return segment
+
+
+def _append_records(rows):
+    """Append rows to the open segment and return (id, segment, offset) for each."""
+    os.makedirs(ARCHIVE_DIR, exist_ok=True)
+    segment = _current_segment()
+    locations = []
+    with open(_segment_path(segment), "ab") as seg:
+        offset = seg.tell()
+        for row in rows:
+            payload = zlib.compress(json.dumps({
+                "proof": row["proof"],
+                "calldata": row["calldata"],
+            }).encode("utf-8"), 9)
+            seg.write(_HEADER.pack(row["id"], len(payload)))
+            seg.write(payload)
+            locations.append((row["id"], segment, offset))
+            offset += _HEADER.size + len(payload)
+        seg.flush()
+        os.fsync(seg.fileno())
+    return locations
+
+
+def archive_batch(max_age_days=RETENTION_MAX_AGE_DAYS, limit=ARCHIVE_BATCH_SIZE):
+    """Archive up to limit completed proofs older than max_age_days; return how many."""
+    cutoff = datetime.now() - timedelta(days=max_age_days)
+    with _write_lock:
+        conn = sqlite3.connect(database.DB_PATH, timeout=LOCK_TIMEOUT_SECONDS, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            # The write lock is taken before the SELECT and held through the
+            # segment append and the UPDATE, so another process archiving the
+            # same database (the CLI next to the server) waits here instead of
+            # picking the same rows and interleaving writes into the segment.
+            conn.execute('BEGIN IMMEDIATE')
+            rows = conn.execute('''
+                SELECT id, proof, calldata FROM requests
+                WHERE status = 'Completed' AND proof IS NOT NULL
+                  AND archive_segment IS NULL AND created_at < ?
+                ORDER BY created_at
+                LIMIT ?
+            ''', (cutoff, limit)).fetchall()
+            if not rows:
+                conn.execute('ROLLBACK')
+                return 0
+
+            # Records are durable before SQLite forgets the proof. A crash in
+            # between only leaves unreferenced bytes in the segment.
+            locations = _append_records(rows)
+            conn.executemany('''
+                UPDATE requests
+                SET proof = NULL, calldata = NULL, archive_segment = ?, archive_offset = ?
+                WHERE id = ?
+            ''', [(segment, offset, req_id) for req_id, segment, offset in locations])
+            conn.execute('COMMIT')
+            return len(rows)
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            raise
+        finally:
+            conn.close()
+
+
+def archive_old_proofs(max_age_days=RETENTION_MAX_AGE_DAYS):
+    """Move all completed proofs older than max_age_days into archive segments."""
+    archived = 0
+    while True:
+        count = archive_batch(max_age_days)
+        if not count:
+            return archived
+        archived += count
+
+
+def incremental_vacuum(pages=VACUUM_PAGES):
+    """Release up to pages free pages to the OS; return how many remain free."""
+    conn = sqlite3.connect(database.DB_PATH, timeout=LOCK_TIMEOUT_SECONDS)
+    try:
+        # Without incremental mode the pragma is a no-op; report nothing left
+        # so callers looping on the result terminate.
+        if conn.execute('PRAGMA auto_vacuum').fetchone()[0] != 2:
+            return 0
+        # execute() steps the pragma only once, freeing a single page;
+        # executescript() runs it to completion.
+        conn.executescript(f'PRAGMA incremental_vacuum({int(pages)});')
+        return conn.execute('PRAGMA freelist_count').fetchone()[0]
+    finally:
+        conn.close()
+
+
+def vacuum_free_pages():
+    """Release every free page, VACUUM_PAGES at a time."""
+    remaining = incremental_vacuum()
+    while remaining:
+        time.sleep(ARCHIVE_BATCH_PAUSE_SECONDS)
+        previous, remaining = remaining, incremental_vacuum()
+        if remaining >= previous:
+            break
+
+
+def load_archived(req):
+    """Fill in proof and calldata for a request row whose proof was archived."""
+    if req is None or req.get("archive_segment") is None:
+        return req
+
+    with open(_segment_path(req["archive_segment"]), "rb") as seg:
+        seg.seek(req["archive_offset"])
+        req_id, length = _HEADER.unpack(seg.read(_HEADER.size))
+        if req_id != req["id"]:
+            raise ValueError(f"Archive record at segment {req['archive_segment']} offset {req['archive_offset']} belongs to request {req_id}, not {req['id']}")
+        record = json.loads(zlib.decompress(seg.read(length)))
+
+    req = dict(req)
+    req["proof"] = record["proof"]
+    req["calldata"] = record["calldata"]
+    return req
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintain the requests table archive")
+    parser.add_argument("command", choices=["migrate", "archive"],
+                        help="migrate: enable incremental vacuum on an existing database; "
+                             "archive: archive old proofs and vacuum now")
+    parser.add_argument("--db", default=database.DB_PATH, help="SQLite file (default: %(default)s)")
+    args = parser.parse_args()
+    database.DB_PATH = args.db
+
+    try:
+        if args.command == "migrate":
+            print(f"Converting {args.db} to incremental vacuum, this rewrites the whole file...")
+            if database.enable_incremental_vacuum():
+                print("Migration complete.")
+            else:
+                print("Already in incremental vacuum mode.")
+        else:
+            database.init_db()
+            archived = archive_old_proofs()
+            vacuum_free_pages()
+            print(f"Archived {archived} proofs")
+    except sqlite3.OperationalError as e:
+        print(f"Error: {e}")
+        if args.command == "migrate":
+            print(f"Stop the server and any batch jobs using {args.db} and retry.")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
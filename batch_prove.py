@@ -0,0 +1,335 @@
+import argparse
+import asyncio
+import csv
+import json
+import math
+import os
+import shutil
+import sys
+import tempfile
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from types import SimpleNamespace
+
+import numpy as np
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+ZK_DIR = os.path.join(BASE_DIR, "zk-circuit")
+MODEL_PATH = os.path.join(ZK_DIR, "model.ezkl")
+PK_PATH = os.path.join(ZK_DIR, "key.pk")
+SRS_PATH = os.path.join(ZK_DIR, "kzg15.srs")
+SCALER_PARAMS_PATH = os.path.join(BASE_DIR, "ai", "scaler_params.json")
+
+FIELDS = ["age", "income", "debt", "history", "open_acc"]
+
+# Per-process state, set up once by init_worker
+_worker = {}
+
+
+def load_scaler():
+    with open(SCALER_PARAMS_PATH, "r") as f:
+        params = json.load(f)
+    return np.asarray(params["mean"], dtype=np.float64), np.asarray(params["scale"], dtype=np.float64)
+
+
+def read_applicants(path):
+    """Yield applicant dicts from a CSV or JSONL file, one at a time."""
+    if path.endswith(".jsonl"):
+        with open(path, "r") as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        # Reported as a failed row by parse_applicant
+                        yield None
+    else:
+        with open(path, "r", newline="") as f:
+            yield from csv.DictReader(f)
+
+
+def read_chunks(path, start_row, chunk_size):
+    """Yield (first_row, applicants) chunks, skipping rows before start_row."""
+    chunk = []
+    first_row = start_row
+    for row, applicant in enumerate(read_applicants(path)):
+        if row < start_row:
+            continue
+        chunk.append(applicant)
+        if len(chunk) == chunk_size:
+            yield first_row, chunk
+            first_row += len(chunk)
+            chunk = []
+    if chunk:
+        yield first_row, chunk
+
+
+def parse_applicant(applicant):
+    """Return the model's raw inputs for one applicant, or raise ValueError."""
+    if not isinstance(applicant, dict):
+        raise ValueError("not a JSON object")
+    values = []
+    for field in FIELDS:
+        value = applicant.get(field)
+        if value is None or str(value).strip() == "":
+            raise ValueError(f"missing {field}")
+        try:
+            number = float(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"invalid {field}: {value!r}")
+        if not math.isfinite(number):
+            raise ValueError(f"invalid {field}: {value!r}")
+        # The API takes integers, and the DB stores what was proved
+        if not number.is_integer():
+            raise ValueError(f"{field} must be a whole number: {value!r}")
+        values.append(number)
+    return values
+
+
+def scale_rows(raw_rows, mean, scale):
+    if not raw_rows:
+        return []
+    raw = np.array(raw_rows, dtype=np.float64)
+    return ((raw - mean) / scale).tolist()
+
+
+def _await(res):
+    if asyncio.iscoroutine(res):
+        return asyncio.run(res)
+    return res
+
+
+def init_worker(model_path, pk_path, srs_path, tmp_dir):
+    # ezkl's Python bindings take key paths rather than in-memory keys, so
+    # the best we can do is resolve them once and warm the page cache.
+    import ezkl
+    for path in (model_path, pk_path, srs_path):
+        with open(path, "rb") as f:
+            while f.read(1 << 20):
+                pass
+    _worker["ezkl"] = ezkl
+    _worker["model_path"] = model_path
+    _worker["pk_path"] = pk_path
+    _worker["srs_path"] = srs_path
+    _worker["tmp_dir"] = tmp_dir
+
+
+def prove_one(job):
+    row, scaled_inputs = job
+    ezkl = _worker["ezkl"]
+    prefix = os.path.join(_worker["tmp_dir"], str(row))
+    input_path = prefix + ".input.json"
+    witness_path = prefix + ".witness.json"
+    proof_path = prefix + ".proof"
+    calldata_path = prefix + ".calldata"
+
+    try:
+        with open(input_path, "w") as f:
+            json.dump({"input_data": [scaled_inputs]}, f)
+
+        _await(ezkl.gen_witness(input_path, _worker["model_path"], witness_path))
+        _await(ezkl.prove(
+            witness_path,
+            _worker["model_path"],
+            _worker["pk_path"],
+            proof_path,
+            srs_path=_worker["srs_path"]
+        ))
+
+        with open(proof_path, "rb") as f:
+            proof_hex = f.read().hex()
+
+        # EVM calldata for verifyProof, as the server stores for the artifact bundle
+        _await(ezkl.encode_evm_calldata(proof_path, calldata_path))
+        with open(calldata_path, "rb") as f:
+            calldata_hex = f.read().hex()
+
+        public_instances = []
+        with open(witness_path, "r") as f:
+            witness_data = json.load(f)
+            if isinstance(witness_data, dict):
+                if "outputs" in witness_data:
+                    public_instances = witness_data["outputs"][0]
+                elif "instances" in witness_data:
+                    public_instances = witness_data["instances"][0]
+            elif isinstance(witness_data, list):
+                public_instances = witness_data[0]
+
+        return row, proof_hex, public_instances, calldata_hex, None
+    except Exception as e:
+        return row, None, None, None, str(e)
+    finally:
+        for path in (input_path, witness_path, proof_path, calldata_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def input_fingerprint(input_path):
+    """Identify the exact input file a checkpoint was written for."""
+    st = os.stat(input_path)
+    return {"input": os.path.abspath(input_path), "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+
+def load_checkpoint(path, input_path):
+    """Return the checkpoint for input_path, or a fresh one starting at row 0."""
+    fingerprint = input_fingerprint(input_path)
+    if not os.path.exists(path):
+        return dict(fingerprint, run_id=uuid.uuid4().hex, next_row=0)
+    with open(path, "r") as f:
+        checkpoint = json.load(f)
+    if {key: checkpoint.get(key) for key in fingerprint} != fingerprint:
+        # e.g. tonight's applicants.csv replaced an interrupted run's file
+        print(f"Checkpoint {path} was written for a different version of {checkpoint.get('input')}, refusing to resume. "
+              f"Delete it to start a new run.")
+        sys.exit(1)
+    checkpoint.setdefault("run_id", uuid.uuid4().hex)
+    return checkpoint
+
+
+def save_checkpoint(path, checkpoint, next_row):
+    checkpoint["next_row"] = next_row
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp_path, path)
+
+
+def clear_checkpoint(path):
+    """Forget a finished run so the next run on the same path starts afresh."""
+    if os.path.exists(path):
+        os.remove(path)
+
+
+class DirectorySink:
+    def __init__(self, out_dir):
+        self.out_dir = out_dir
+        os.makedirs(out_dir, exist_ok=True)
+        self.failures = open(os.path.join(out_dir, "failed.jsonl"), "a")
+
+    def write(self, row, values, proof_hex, public_instances, calldata_hex, error):
+        if error:
+            self.failures.write(json.dumps({"row": row, "error": error}) + "\n")
+            return True
+        with open(os.path.join(self.out_dir, f"{row}.proof"), "wb") as f:
+            f.write(bytes.fromhex(proof_hex))
+        with open(os.path.join(self.out_dir, f"{row}.instances.json"), "w") as f:
+            json.dump(public_instances, f)
+        with open(os.path.join(self.out_dir, f"{row}.calldata"), "wb") as f:
+            f.write(bytes.fromhex(calldata_hex))
+        return True
+
+    def flush(self):
+        self.failures.flush()
+        os.fsync(self.failures.fileno())
+
+    def close(self):
+        self.failures.close()
+
+
+class DatabaseSink:
+    def __init__(self, db_path, run_id):
+        self.run_id = run_id
+        sys.path.insert(0, os.path.join(BASE_DIR, "backend"))
+        import database
+        database.DB_PATH = db_path
+        database.init_db()
+        self.database = database
+
+    def write(self, row, values, proof_hex, public_instances, calldata_hex, error):
+        data = SimpleNamespace(**{field: int(values[i]) if values else None for i, field in enumerate(FIELDS)})
+        # One insert with the final status, keyed by run and source row so
+        # rows written after the last checkpoint are not duplicated on resume,
+        # while a new run (new run_id) proves every row again.
+        batch_key = f"{self.run_id}:{row}"
+        if error:
+            return self.database.record_request(data, batch_key, status='Failed')
+        else:
+            return self.database.record_request(
+                data, batch_key, proof_hex,
+                public_instances=public_instances, status='Completed', calldata=calldata_hex
+            )
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prove credit scores for a file of applicants")
+    parser.add_argument("input", help="CSV or JSONL file with age, income, debt, history, open_acc")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--out-dir", help="write <row>.proof, <row>.instances.json and <row>.calldata here")
+    target.add_argument("--db", help="write results into the requests table of this SQLite file")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-size", type=int, default=256, help="rows scaled and dispatched per batch")
+    parser.add_argument("--checkpoint", help="checkpoint file (default: <input>.checkpoint)")
+    args = parser.parse_args()
+
+    checkpoint_path = args.checkpoint or args.input + ".checkpoint"
+    checkpoint = load_checkpoint(checkpoint_path, args.input)
+    start_row = checkpoint["next_row"]
+    if start_row:
+        print(f"Resuming from row {start_row}")
+
+    mean, scale = load_scaler()
+    sink = DirectorySink(args.out_dir) if args.out_dir else DatabaseSink(args.db, checkpoint["run_id"])
+
+    proved = failed = skipped = 0
+    next_row = start_row
+    # Shared by all workers; scratch files are named by row so they never clash
+    tmp_dir = tempfile.mkdtemp(prefix="batch_prove_")
+    try:
+        with ProcessPoolExecutor(
+            max_workers=args.workers,
+            initializer=init_worker,
+            initargs=(MODEL_PATH, PK_PATH, SRS_PATH, tmp_dir)
+        ) as pool:
+            for first_row, applicants in read_chunks(args.input, start_row, args.chunk_size):
+                # Bad rows are recorded as failures rather than aborting the run
+                chunk_values = []
+                for applicant in applicants:
+                    try:
+                        chunk_values.append(parse_applicant(applicant))
+                    except ValueError as e:
+                        chunk_values.append(e)
+                valid = [(first_row + i, v) for i, v in enumerate(chunk_values) if isinstance(v, list)]
+                scaled = scale_rows([v for _, v in valid], mean, scale)
+                results = pool.map(prove_one, [(row, inputs) for (row, _), inputs in zip(valid, scaled)])
+
+                # map yields in row order, so the checkpoint is always a clean prefix
+                for i, values in enumerate(chunk_values):
+                    if isinstance(values, list):
+                        row, proof_hex, public_instances, calldata_hex, error = next(results)
+                    else:
+                        row, proof_hex, public_instances, calldata_hex = first_row + i, None, None, None
+                        error = f"Invalid row: {values}"
+                        values = None
+                    if not sink.write(row, values, proof_hex, public_instances, calldata_hex, error):
+                        # Already written by this run before it was interrupted
+                        skipped += 1
+                    elif error:
+                        failed += 1
+                    else:
+                        proved += 1
+                    next_row = row + 1
+                sink.flush()
+                save_checkpoint(checkpoint_path, checkpoint, next_row)
+                print(f"Rows done: {next_row} (proved {proved}, failed {failed}, already written {skipped})")
+    except KeyboardInterrupt:
+        sink.flush()
+        save_checkpoint(checkpoint_path, checkpoint, next_row)
+        print(f"Interrupted, checkpoint saved at row {next_row}")
+        sys.exit(130)
+    finally:
+        sink.close()
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    clear_checkpoint(checkpoint_path)
+    print(f"Batch complete: proved {proved}, failed {failed}, already written {skipped}")
+
+
+if __name__ == "__main__":
+    main()
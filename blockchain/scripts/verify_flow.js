@@ -61,9 +61,16 @@ async function main() {
             console.log(`Status: ${statusData.status}`);
 
             if (statusData.status === 'Completed') {
-                proof = statusData.proof;
-                if (statusData.public_instances) {
-                    publicInstances = statusData.public_instances;
+                // The proof is served by the artifact endpoint, not the status call
+                const artifactRes = await fetch(`http://localhost:8000${statusData.artifact_url}`);
+                if (!artifactRes.ok) {
+                    console.error(`Failed to fetch proof artifact: ${artifactRes.status}`);
+                    process.exit(1);
+                }
+                const artifact = await artifactRes.json();
+                proof = artifact.proof;
+                if (artifact.public_instances) {
+                    publicInstances = artifact.public_instances;
                     console.log(`Public Instances: ${JSON.stringify(publicInstances)}`);
                 }
                 console.log("Proof received!");
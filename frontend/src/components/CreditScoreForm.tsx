@@ -60,18 +60,18 @@ export default function CreditScoreForm() {
 
                     if (statusData.status === 'Completed') {
                         clearInterval(pollInterval);
-                        setProof(statusData.proof);
-                        if (statusData.public_instances) {
-                            setPublicInstances(statusData.public_instances);
+                        // Status stays small; the immutable artifact carries the proof
+                        const artifactRes = await fetch(`http://localhost:8000${statusData.artifact_url}`);
+                        if (!artifactRes.ok) {
+                            setError('Failed to fetch proof from server.');
+                            setLoading(false);
+                            return;
+                        }
+                        const artifact = await artifactRes.json();
+                        setProof(artifact.proof);
+                        if (artifact.public_instances) {
+                            setPublicInstances(artifact.public_instances);
                         }
-                        // Public instances might not be in statusData yet if we didn't add them to get_request
-                        // For now we might miss public_instances. 
-                        // If we need them, we should ensure backend returns them.
-                        // Checked backend: get_request returns dict(row). Schema doesn't have public_instances.
-                        // So we might need to rely on what we have or just empty for verify?
-                        // The verify button uses state `publicInstances`.
-                        // If backend doesn't return them, we might default to empty or fix backend?
-                        // Let's assume for this fix we prioritize non-blocking.
                         setLoading(false);
                     } else if (statusData.status === 'Failed') {
                         clearInterval(pollInterval);
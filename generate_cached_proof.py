@@ -19,9 +19,11 @@ async def main():
     # age: 30, income: 50000, debt: 2000, history: 5, open_acc: 3
     raw_inputs = [30.0, 50000.0, 2000.0, 5.0, 3.0]
     
-    # Scaler Params form ai/scaler_params.json
-    SCALER_MEAN = [43.819, 84905.976, 25705.825, 14.895, 4.919]
-    SCALER_SCALE = [14.983532260451813, 38411.66875541112, 14187.575566331818, 8.563525850956488, 2.5939234761264673]
+    # Scaler Params from ai/scaler_params.json
+    with open(os.path.join(BASE_DIR, "ai", "scaler_params.json"), "r") as f:
+        scaler_params = json.load(f)
+    SCALER_MEAN = scaler_params["mean"]
+    SCALER_SCALE = scaler_params["scale"]
 
     scaled_inputs = []
     for i, val in enumerate(raw_inputs):
@@ -0,0 +1,111 @@
+import asyncio
+import gzip
+import hashlib
+from types import SimpleNamespace
+
+import pytest
+
+import artifacts
+
+
+@pytest.fixture
+def no_zstd(monkeypatch):
+    monkeypatch.setattr(artifacts, "zstandard", None)
+
+
+@pytest.fixture
+def with_zstd(monkeypatch):
+    monkeypatch.setattr(artifacts, "zstandard", object())
+
+
+def request(**headers):
+    return SimpleNamespace(headers={k.replace("_", "-"): v for k, v in headers.items()})
+
+
+def test_choose_encoding_without_header(no_zstd):
+    assert artifacts.choose_encoding(None) == "identity"
+    assert artifacts.choose_encoding("") == "identity"
+
+
+def test_choose_encoding_prefers_zstd(with_zstd):
+    assert artifacts.choose_encoding("gzip, deflate, br, zstd") == "zstd"
+
+
+def test_choose_encoding_respects_q_values(with_zstd):
+    assert artifacts.choose_encoding("zstd;q=0.5, gzip;q=0.8") == "gzip"
+    assert artifacts.choose_encoding("gzip;q=0, zstd;q=0") == "identity"
+    assert artifacts.choose_encoding("gzip;q=bogus") == "identity"
+
+
+def test_choose_encoding_wildcard(no_zstd):
+    assert artifacts.choose_encoding("*") == "gzip"
+    assert artifacts.choose_encoding("*;q=0.5, gzip;q=0") == "identity"
+
+
+def test_choose_encoding_falls_back_without_zstd(no_zstd):
+    assert artifacts.choose_encoding("zstd") == "identity"
+    assert artifacts.choose_encoding("zstd, gzip") == "gzip"
+
+
+def test_etag_matches_strong_and_weak():
+    etag = '"abc-gzip"'
+    assert artifacts._etag_matches('"abc-gzip"', etag)
+    assert artifacts._etag_matches('W/"abc-gzip"', etag)
+    assert artifacts._etag_matches('"other", W/"abc-gzip"', etag)
+    assert not artifacts._etag_matches('"abc"', etag)
+    assert not artifacts._etag_matches('W/"abc-zstd"', etag)
+    assert not artifacts._etag_matches(None, etag)
+
+
+def test_etag_matches_star():
+    assert artifacts._etag_matches("*", '"abc"')
+
+
+def respond(req, body=b"x" * 4096, digest="abc", kind="bundle"):
+    loads = []
+
+    async def load_body():
+        loads.append(1)
+        return body
+
+    response = asyncio.run(artifacts.artifact_response(req, digest, kind, load_body, "application/json"))
+    return response, loads
+
+
+def test_representation_etag():
+    assert artifacts.representation_etag("abc", "proof", "identity") == '"abc-proof"'
+    assert artifacts.representation_etag("abc", "bundle", "gzip") == '"abc-bundle-gzip"'
+
+
+def test_artifact_response_revalidates_same_representation(no_zstd):
+    first, _ = respond(request(accept_encoding="gzip"))
+    assert first.status_code == 200
+    assert first.headers["content-encoding"] == "gzip"
+    assert "immutable" in first.headers["cache-control"]
+    assert gzip.decompress(first.body) == b"x" * 4096
+    etag = first.headers["etag"]
+
+    again, loads = respond(request(accept_encoding="gzip", if_none_match="W/" + etag))
+    assert again.status_code == 304
+    assert again.headers["etag"] == etag
+    # The stored digest answers the conditional request without the body
+    assert loads == []
+
+
+def test_artifact_response_no_304_for_other_coding(no_zstd):
+    gzipped, _ = respond(request(accept_encoding="gzip"), digest="other")
+    plain, loads = respond(request(if_none_match=gzipped.headers["etag"]), digest="other")
+    assert plain.status_code == 200
+    assert "content-encoding" not in plain.headers
+    assert plain.body == b"x" * 4096
+    assert loads == [1]
+
+
+def test_artifact_response_hashes_body_without_digest(no_zstd):
+    body = b"legacy" * 100
+    first, loads = respond(request(), body=body, digest=None, kind="proof")
+    assert loads == [1]
+    assert first.headers["etag"] == '"%s-proof"' % hashlib.sha256(body).hexdigest()
+
+    again, _ = respond(request(if_none_match=first.headers["etag"]), body=body, digest=None, kind="proof")
+    assert again.status_code == 304
@@ -0,0 +1,137 @@
+import json
+import os
+import sqlite3
+
+import pytest
+
+import batch_prove
+import database
+
+
+APPLICANT = {"age": "30", "income": "50000", "debt": "2000", "history": "5", "open_acc": "3"}
+
+
+def test_parse_applicant_accepts_csv_strings_and_numbers():
+    assert batch_prove.parse_applicant(APPLICANT) == [30.0, 50000.0, 2000.0, 5.0, 3.0]
+    assert batch_prove.parse_applicant({**APPLICANT, "age": 30, "income": 50000.0})[:2] == [30.0, 50000.0]
+
+
+@pytest.mark.parametrize("applicant, message", [
+    ({k: v for k, v in APPLICANT.items() if k != "debt"}, "missing debt"),
+    ({**APPLICANT, "income": ""}, "missing income"),
+    ({**APPLICANT, "income": "lots"}, "invalid income"),
+    ({**APPLICANT, "income": "inf"}, "invalid income"),
+    ({**APPLICANT, "age": "30.5"}, "age must be a whole number"),
+    (None, "not a JSON object"),
+    ([1, 2, 3], "not a JSON object"),
+])
+def test_parse_applicant_rejects_bad_rows(applicant, message):
+    with pytest.raises(ValueError, match=message):
+        batch_prove.parse_applicant(applicant)
+
+
+def test_scale_rows_matches_per_row_formula():
+    mean, scale = batch_prove.load_scaler()
+    rows = [[30.0, 50000.0, 2000.0, 5.0, 3.0], [65.0, 120000.0, 0.0, 30.0, 9.0]]
+    scaled = batch_prove.scale_rows(rows, mean, scale)
+    # Same formula as process_proof_task in backend/main.py
+    for raw, out in zip(rows, scaled):
+        expected = [(val - mean[i]) / scale[i] for i, val in enumerate(raw)]
+        assert out == pytest.approx(expected)
+    assert batch_prove.scale_rows([], mean, scale) == []
+
+
+def test_read_chunks_numbers_jsonl_rows(tmp_path):
+    path = tmp_path / "applicants.jsonl"
+    lines = [json.dumps(APPLICANT), "", "not json", json.dumps(APPLICANT), "   ", json.dumps(APPLICANT)]
+    path.write_text("\n".join(lines) + "\n")
+
+    chunks = list(batch_prove.read_chunks(str(path), 0, 2))
+    # Blank lines are not rows; unparseable lines are, so they can be reported
+    assert [(first, len(rows)) for first, rows in chunks] == [(0, 2), (2, 2)]
+    assert chunks[0][1][1] is None
+
+    resumed = list(batch_prove.read_chunks(str(path), 1, 2))
+    assert [(first, len(rows)) for first, rows in resumed] == [(1, 2), (3, 1)]
+    assert resumed[0][1][0] is None
+
+
+def test_read_chunks_csv(tmp_path):
+    path = tmp_path / "applicants.csv"
+    path.write_text("age,income,debt,history,open_acc\n30,50000,2000,5,3\n40,1,2,3,4\n50,1,2,3,4\n")
+    chunks = list(batch_prove.read_chunks(str(path), 1, 5))
+    assert len(chunks) == 1
+    first, rows = chunks[0]
+    assert first == 1
+    assert [row["age"] for row in rows] == ["40", "50"]
+
+
+def test_checkpoint_round_trip(tmp_path):
+    input_path = tmp_path / "applicants.csv"
+    input_path.write_text("age\n1\n")
+    checkpoint_path = str(tmp_path / "run.checkpoint")
+
+    fresh = batch_prove.load_checkpoint(checkpoint_path, str(input_path))
+    assert fresh["next_row"] == 0
+    assert fresh["run_id"]
+
+    batch_prove.save_checkpoint(checkpoint_path, fresh, 42)
+    resumed = batch_prove.load_checkpoint(checkpoint_path, str(input_path))
+    assert resumed["next_row"] == 42
+    assert resumed["run_id"] == fresh["run_id"]
+
+    batch_prove.clear_checkpoint(checkpoint_path)
+    assert not os.path.exists(checkpoint_path)
+    assert batch_prove.load_checkpoint(checkpoint_path, str(input_path))["run_id"] != fresh["run_id"]
+
+
+def test_checkpoint_refuses_changed_input(tmp_path):
+    input_path = tmp_path / "applicants.csv"
+    input_path.write_text("age\n1\n")
+    checkpoint_path = str(tmp_path / "run.checkpoint")
+    batch_prove.save_checkpoint(checkpoint_path, batch_prove.load_checkpoint(checkpoint_path, str(input_path)), 1)
+
+    input_path.write_text("age\n1\n2\n")
+    with pytest.raises(SystemExit):
+        batch_prove.load_checkpoint(checkpoint_path, str(input_path))
+
+
+def test_directory_sink(tmp_path):
+    sink = batch_prove.DirectorySink(str(tmp_path / "out"))
+    assert sink.write(0, [1.0] * 5, "abcd", ["7"], "ef", None)
+    assert sink.write(1, None, None, None, None, "Invalid row: missing age")
+    sink.flush()
+    sink.close()
+
+    out = tmp_path / "out"
+    assert (out / "0.proof").read_bytes() == bytes.fromhex("abcd")
+    assert json.loads((out / "0.instances.json").read_text()) == ["7"]
+    assert (out / "0.calldata").read_bytes() == bytes.fromhex("ef")
+    failures = [json.loads(line) for line in (out / "failed.jsonl").read_text().splitlines()]
+    assert failures == [{"row": 1, "error": "Invalid row: missing age"}]
+
+
+def test_database_sink_dedupes_within_a_run(tmp_path, monkeypatch):
+    db_path = str(tmp_path / "veriscore.db")
+    monkeypatch.setattr(database, "DB_PATH", db_path)
+    values = [30.0, 50000.0, 2000.0, 5.0, 3.0]
+
+    sink = batch_prove.DatabaseSink(db_path, "run-a")
+    assert sink.write(0, values, "abcd", ["7"], "ef", None)
+    assert sink.write(1, None, None, None, None, "Invalid row: missing age")
+    # A resumed run re-proving row 0 does not insert it twice
+    assert not sink.write(0, values, "abcd", ["7"], "ef", None)
+
+    # A new run writes every row again
+    assert batch_prove.DatabaseSink(db_path, "run-b").write(1, values, "abcd", ["7"], "ef", None)
+
+    conn = sqlite3.connect(db_path)
+    rows = conn.execute(
+        "SELECT batch_key, status, age, income, proof, calldata FROM requests ORDER BY id"
+    ).fetchall()
+    conn.close()
+    assert rows == [
+        ("run-a:0", "Completed", 30, 50000, "abcd", "ef"),
+        ("run-a:1", "Failed", None, None, None, None),
+        ("run-b:1", "Completed", 30, 50000, "abcd", "ef"),
+    ]
@@ -0,0 +1,125 @@
+import sqlite3
+from types import SimpleNamespace
+
+import pytest
+
+import database
+import retention
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    monkeypatch.setattr(database, "DB_PATH", str(tmp_path / "veriscore.db"))
+    monkeypatch.setattr(retention, "ARCHIVE_DIR", str(tmp_path / "archive"))
+    database.init_db()
+    return database.DB_PATH
+
+
+def add_completed(proof, calldata=None, created_at=None):
+    data = SimpleNamespace(age=30, income=50000, debt=2000, history=5, open_acc=3)
+    req_id = database.create_request(data)
+    database.update_request_proof(req_id, proof, public_instances=["1"], calldata=calldata)
+    if created_at:
+        conn = sqlite3.connect(database.DB_PATH)
+        conn.execute("UPDATE requests SET created_at = ? WHERE id = ?", (created_at, req_id))
+        conn.commit()
+        conn.close()
+    return req_id
+
+
+def test_archive_round_trip(db):
+    old_ids = [add_completed("ab" * 1000 + str(i), calldata="cd", created_at="2020-01-01 00:00:00") for i in range(3)]
+    recent_id = add_completed("ef" * 10)
+
+    assert retention.archive_old_proofs(max_age_days=30) == 3
+
+    for i, req_id in enumerate(old_ids):
+        row = database.get_request(req_id)
+        assert row["proof"] is None
+        assert row["calldata"] is None
+        assert row["archive_segment"] == 1
+
+        req = retention.load_archived(row)
+        assert req["proof"] == "ab" * 1000 + str(i)
+        assert req["calldata"] == "cd"
+        assert req["public_instances"] == '["1"]'
+
+    recent = database.get_request(recent_id)
+    assert recent["archive_segment"] is None
+    assert retention.load_archived(recent)["proof"] == "ef" * 10
+
+
+def test_archive_is_idempotent(db):
+    add_completed("ab", created_at="2020-01-01 00:00:00")
+    assert retention.archive_old_proofs(max_age_days=30) == 1
+    assert retention.archive_old_proofs(max_age_days=30) == 0
+
+
+def test_archive_batch_respects_limit(db):
+    for _ in range(5):
+        add_completed("ab", created_at="2020-01-01 00:00:00")
+    assert retention.archive_batch(max_age_days=30, limit=2) == 2
+    assert retention.archive_old_proofs(max_age_days=30) == 3
+
+
+def test_load_archived_rejects_mismatched_record(db):
+    req_id = add_completed("ab", created_at="2020-01-01 00:00:00")
+    retention.archive_old_proofs(max_age_days=30)
+    row = dict(database.get_request(req_id))
+    row["id"] = req_id + 1
+    with pytest.raises(ValueError):
+        retention.load_archived(row)
+
+
+def test_load_archived_passes_through_missing_request():
+    assert retention.load_archived(None) is None
+
+
+def test_archive_batch_waits_for_other_writers(db, monkeypatch):
+    req_id = add_completed("ab", created_at="2020-01-01 00:00:00")
+    monkeypatch.setattr(retention, "LOCK_TIMEOUT_SECONDS", 0.1)
+
+    # Another process holding the write lock, e.g. a second archiver
+    other = sqlite3.connect(db, isolation_level=None)
+    other.execute("BEGIN IMMEDIATE")
+    try:
+        with pytest.raises(sqlite3.OperationalError):
+            retention.archive_batch(max_age_days=30)
+    finally:
+        other.execute("ROLLBACK")
+        other.close()
+
+    # Nothing was appended or re-pointed while the lock was held
+    assert database.get_request(req_id)["archive_segment"] is None
+    assert retention.archive_batch(max_age_days=30) == 1
+    assert retention.load_archived(database.get_request(req_id))["proof"] == "ab"
+
+
+def test_vacuum_free_pages_empties_freelist(db, monkeypatch):
+    monkeypatch.setattr(retention, "VACUUM_PAGES", 10)
+    monkeypatch.setattr(retention, "ARCHIVE_BATCH_PAUSE_SECONDS", 0)
+    for _ in range(20):
+        add_completed("ab" * 20000, created_at="2020-01-01 00:00:00")
+    retention.archive_old_proofs(max_age_days=30)
+
+    conn = sqlite3.connect(db)
+    assert conn.execute("PRAGMA freelist_count").fetchone()[0] > retention.VACUUM_PAGES
+    retention.vacuum_free_pages()
+    assert conn.execute("PRAGMA freelist_count").fetchone()[0] == 0
+    conn.close()
+
+
+def test_get_history_is_paginated_summary(db):
+    ids = [add_completed("ab" * 100, calldata="cd") for _ in range(5)]
+    old_id = add_completed("ab", created_at="2020-01-01 00:00:00")
+    retention.archive_old_proofs(max_age_days=30)
+
+    page = database.get_history(limit=2)
+    assert [row["id"] for row in page] == ids[::-1][:2]
+    for row in page:
+        assert "proof" not in row
+        assert "calldata" not in row
+        assert "archive_segment" not in row
+        assert row["status"] == "Completed"
+
+    assert [row["id"] for row in database.get_history(limit=2, offset=4)] == [ids[0], old_id]